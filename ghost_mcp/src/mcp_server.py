@@ -44,6 +44,10 @@ MEDIA_DIR = BASE_DIR / "media"
 # Import our account pool
 from account_pool import AccountPool
 
+# Opt-in per-tool profiling (GHOST_PROFILE=1); tools are left unwrapped when disabled
+from tool_profiler import ToolProfiler
+profiler = ToolProfiler.from_env(default_dir=BASE_DIR / "profiles")
+
 # Import video processors - chunk creation and personalization
 try:
     from chunk_processor import ChunkProcessor
@@ -456,6 +460,7 @@ def _send_ghost_video_workflow(username: str, video_path: str,
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def send_message(username: str, message: str, preferred_account: Optional[str] = None) -> Dict[str, Any]:
     """Send an Instagram direct message to a user by username.
 
@@ -487,6 +492,7 @@ def send_message(username: str, message: str, preferred_account: Optional[str] =
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def get_user_id_from_username(username: str) -> Dict[str, Any]:
     """Get the Instagram user ID for a given username.
 
@@ -508,6 +514,7 @@ def get_user_id_from_username(username: str) -> Dict[str, Any]:
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def get_user_info(username: str) -> Dict[str, Any]:
     """Get detailed information about an Instagram user.
 
@@ -520,6 +527,7 @@ def get_user_info(username: str) -> Dict[str, Any]:
     return _get_user_info_internal(username, client)
 
 @mcp.tool()
+@profiler.profile
 def get_user_posts(username: str, count: int = 12) -> Dict[str, Any]:
     """Get recent posts from an Instagram user.
 
@@ -563,6 +571,7 @@ def get_user_posts(username: str, count: int = 12) -> Dict[str, Any]:
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def upload_video_post(
     video_path: str, 
     caption: str, 
@@ -632,6 +641,7 @@ def upload_video_post(
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def share_post_to_dm(
     username: str, 
     post_url: str,
@@ -686,6 +696,7 @@ def share_post_to_dm(
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def get_account_posts(count: int = 12) -> Dict[str, Any]:
     """Get recent posts from the authenticated account.
     
@@ -717,6 +728,7 @@ def get_account_posts(count: int = 12) -> Dict[str, Any]:
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def create_campaign(
     name: str,
     user_list: List[str],
@@ -807,6 +819,7 @@ def create_campaign(
 # OR use send_ghost_video_with_specific_chunk() which combines steps 3-6
 
 @mcp.tool()
+@profiler.profile
 def get_campaign_status(campaign_id: Optional[str] = None) -> Dict[str, Any]:
     """Get status of campaigns including completion rate and errors.
     
@@ -883,6 +896,7 @@ def get_campaign_status(campaign_id: Optional[str] = None) -> Dict[str, Any]:
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def delete_campaigns(campaign_ids: Optional[List[str]] = None) -> Dict[str, Any]:
     """Delete campaigns by ID or all campaigns if no IDs provided.
     
@@ -952,6 +966,7 @@ def delete_campaigns(campaign_ids: Optional[List[str]] = None) -> Dict[str, Any]
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def fetch_bright_data_users(
     hashtags: List[str],
     min_followers: int = 100,
@@ -1110,6 +1125,7 @@ def fetch_bright_data_users(
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def download_bright_data_snapshot(snapshot_id: str) -> Dict[str, Any]:
     """Download a Bright Data snapshot once it's ready.
     
@@ -1219,6 +1235,7 @@ def download_bright_data_snapshot(snapshot_id: str) -> Dict[str, Any]:
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def select_random_users(
     count: int = 10,
     dataset_path: Optional[str] = None,
@@ -1380,6 +1397,7 @@ def select_random_users(
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def create_video_chunks(
     count: int = 10,
     duration: Optional[int] = None,
@@ -1457,6 +1475,7 @@ def create_video_chunks(
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def list_video_chunks(limit: int = 50, source_filter: Optional[str] = None) -> Dict[str, Any]:
     """List available pre-processed video chunks.
     
@@ -1490,6 +1509,7 @@ def list_video_chunks(limit: int = 50, source_filter: Optional[str] = None) -> D
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def get_chunk_info(chunk_id: str) -> Dict[str, Any]:
     """Get detailed information about a specific video chunk.
     
@@ -1519,6 +1539,7 @@ def get_chunk_info(chunk_id: str) -> Dict[str, Any]:
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def prepare_campaign_videos(
     campaign_id: str,
     usernames: List[str],
@@ -1653,6 +1674,7 @@ def prepare_campaign_videos(
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def personalize_specific_chunk(
     chunk_id: str,
     username: str,
@@ -1707,6 +1729,7 @@ def personalize_specific_chunk(
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def get_account_status() -> Dict[str, Any]:
     """Get status of all configured Instagram accounts.
     
@@ -1744,6 +1767,7 @@ def get_account_status() -> Dict[str, Any]:
         return {"success": False, "message": str(e)}
 
 @mcp.tool()
+@profiler.profile
 def mark_operation_complete() -> Dict[str, Any]:
     """
     Mark the current Instagram operation as complete and trigger account cooldown.
@@ -1781,6 +1805,42 @@ def mark_operation_complete() -> Dict[str, Any]:
         logger.error(f"Failed to mark operation complete: {str(e)}")
         return {"success": False, "message": str(e)}
 
+@mcp.tool()
+def get_profile_summary(limit: int = 10, tool_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    List the slowest recent tool calls recorded by the profiler.
+    
+    Profiling is enabled by starting the server with GHOST_PROFILE=1.
+    
+    Args:
+        limit: Maximum number of calls to return (default: 10)
+        tool_name: Only include calls to this tool (optional)
+        
+    Returns:
+        Dictionary with per-call wall time, Python CPU time, child process
+        (ffmpeg/ffprobe) CPU time and the path to the cProfile dump if sampled.
+        Sampled calls include cProfile overhead, so their wall time is inflated.
+    """
+    if not profiler.enabled:
+        return {
+            "success": False,
+            "message": "Profiling is disabled. Set GHOST_PROFILE=1 and restart the server."
+        }
+    
+    try:
+        calls = profiler.slowest_calls(limit=limit, tool=tool_name)
+        return {
+            "success": True,
+            "profile_dir": str(profiler.output_dir),
+            "sample_every": profiler.sample_every,
+            "dumps_enabled": profiler.dumps_enabled,
+            "count": len(calls),
+            "calls": calls
+        }
+    except Exception as e:
+        logger.error(f"Failed to get profile summary: {str(e)}")
+        return {"success": False, "message": str(e)}
+
 if __name__ == "__main__":
    parser = argparse.ArgumentParser()
    parser.add_argument("--username", type=str, help="Instagram username (can also be set via INSTAGRAM_USERNAME env var)")
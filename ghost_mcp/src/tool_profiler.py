@@ -0,0 +1,198 @@
+"""
+Tool Profiler - Opt-in per-call profiling for MCP tools
+Records wall time, Python CPU time, ffmpeg/ffprobe child CPU time and cProfile dumps
+"""
+
+import os
+import time
+import cProfile
+import logging
+import functools
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+class ToolProfiler:
+    def __init__(self, enabled: bool = False, output_dir: Optional[Path] = None,
+                 sample_every: int = 1, max_files: int = 50, history_size: int = 200):
+        self.enabled = enabled
+        self.sample_every = max(1, sample_every)
+        self.max_files = max(1, max_files)
+        self.output_dir = Path(output_dir) if output_dir else Path(__file__).parent.parent / "profiles"
+        self.dumps_enabled = enabled
+        self.calls = deque(maxlen=history_size)
+        self._dump_files = deque()
+        self._call_count = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        if self.enabled:
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                # Keep timing calls, but don't let diagnostics stop the server from starting
+                logger.warning(f"Cannot create profile directory {self.output_dir}, cProfile dumps disabled: {e}")
+                self.dumps_enabled = False
+            if self.dumps_enabled:
+                # Apply max_files to dumps left behind by earlier runs too
+                try:
+                    existing = sorted(self.output_dir.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+                except OSError as e:
+                    logger.warning(f"Failed to scan {self.output_dir} for old profiles: {e}")
+                    existing = []
+                self._dump_files.extend(existing)
+                self._prune_dumps()
+            logger.info(f"Tool profiling enabled (sample every {self.sample_every} calls) -> {self.output_dir}")
+
+    @classmethod
+    def from_env(cls, default_dir: Optional[Path] = None) -> "ToolProfiler":
+        """Build a profiler from GHOST_PROFILE, GHOST_PROFILE_DIR, GHOST_PROFILE_SAMPLE and GHOST_PROFILE_MAX_FILES"""
+        enabled = os.getenv("GHOST_PROFILE", "").lower() in ("1", "true", "yes", "on")
+        output_dir = os.getenv("GHOST_PROFILE_DIR") or default_dir
+        try:
+            sample_every = int(os.getenv("GHOST_PROFILE_SAMPLE", "1"))
+        except ValueError:
+            logger.warning("Invalid GHOST_PROFILE_SAMPLE, profiling every call")
+            sample_every = 1
+        try:
+            max_files = int(os.getenv("GHOST_PROFILE_MAX_FILES", "50"))
+        except ValueError:
+            logger.warning("Invalid GHOST_PROFILE_MAX_FILES, keeping 50 dumps")
+            max_files = 50
+        return cls(enabled=enabled, output_dir=output_dir, sample_every=sample_every, max_files=max_files)
+
+    def profile(self, func: Callable) -> Callable:
+        """Wrap a tool function. Returns it untouched when profiling is disabled."""
+        if not self.enabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Nested tool calls (e.g. select_random_users retrying itself) belong to the outer
+            # call's record; a second cProfile can't run while the first is active
+            if getattr(self._local, "active", False):
+                return func(*args, **kwargs)
+            self._local.active = True
+            try:
+                return self._profiled_call(func, args, kwargs)
+            finally:
+                self._local.active = False
+
+        return wrapper
+
+    def _profiled_call(self, func: Callable, args: tuple, kwargs: dict) -> Any:
+        """Run one top-level tool call under timing and, if sampled, cProfile"""
+        with self._lock:
+            self._call_count += 1
+            call_number = self._call_count
+        sampled = self.dumps_enabled and call_number % self.sample_every == 0
+
+        profiler = cProfile.Profile() if sampled else None
+        children_before = self._children_cpu()
+        cpu_before = time.process_time()
+        started_at = datetime.now()
+        start = time.perf_counter()
+        error = None
+        try:
+            if profiler:
+                result = profiler.runcall(func, *args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+            # Tools catch their own exceptions and report failure in the result
+            if isinstance(result, dict) and result.get("success") is False:
+                error = str(result.get("message", "unknown error"))
+            return result
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            wall_time = time.perf_counter() - start
+            cpu_time = time.process_time() - cpu_before
+            children_after = self._children_cpu()
+            self._record(func.__name__, call_number, started_at, wall_time, cpu_time,
+                         children_before, children_after, profiler, error)
+
+    def _children_cpu(self) -> Optional[float]:
+        """User + system CPU seconds of all waited-for child processes (ffmpeg/ffprobe)"""
+        if resource is None:
+            return None
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+
+    def _record(self, tool: str, call_number: int, started_at: datetime, wall_time: float, cpu_time: float,
+                children_before: Optional[float], children_after: Optional[float],
+                profiler: Optional[cProfile.Profile], error: Optional[str]) -> None:
+        """Store a call record and dump its cProfile stats if it was sampled"""
+        profile_path = None
+        if profiler:
+            profile_path = self.output_dir / f"{started_at.strftime('%Y%m%d_%H%M%S')}_{call_number:06d}_{tool}.prof"
+            try:
+                profiler.dump_stats(str(profile_path))
+                with self._lock:
+                    self._dump_files.append(profile_path)
+                self._prune_dumps()
+            except Exception as e:
+                logger.warning(f"Failed to write profile for {tool}: {e}")
+                profile_path = None
+
+        child_cpu_time = None
+        if children_before is not None and children_after is not None:
+            child_cpu_time = round(children_after - children_before, 4)
+
+        record = {
+            "tool": tool,
+            "call_number": call_number,
+            "started_at": started_at.isoformat(),
+            "success": error is None,
+            "sampled": profiler is not None,
+            "wall_time": round(wall_time, 4),
+            "cpu_time": round(cpu_time, 4),
+            "child_cpu_time": child_cpu_time,
+            "profile_path": str(profile_path) if profile_path else None,
+            "error": error
+        }
+        with self._lock:
+            self.calls.append(record)
+        logger.debug(f"Profiled {tool}: wall={record['wall_time']}s cpu={record['cpu_time']}s children={child_cpu_time}s")
+
+    def _prune_dumps(self) -> None:
+        """Delete the oldest tracked dumps beyond max_files"""
+        with self._lock:
+            stale = []
+            while len(self._dump_files) > self.max_files:
+                stale.append(self._dump_files.popleft())
+        if stale:
+            stale_paths = {str(path) for path in stale}
+            with self._lock:
+                for record in self.calls:
+                    if record["profile_path"] in stale_paths:
+                        record["profile_path"] = None
+        for path in stale:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to remove old profile {path}: {e}")
+
+    def slowest_calls(self, limit: int = 10, tool: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the slowest recent calls, optionally filtered by tool name.
+        
+        Sampled calls include cProfile overhead, so their wall_time is inflated.
+        """
+        limit = max(1, limit)
+        with self._lock:
+            calls = list(self.calls)
+        if tool:
+            calls = [c for c in calls if c["tool"] == tool]
+        calls.sort(key=lambda c: c["wall_time"], reverse=True)
+        return calls[:limit]
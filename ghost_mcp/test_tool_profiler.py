@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the opt-in per-tool profiler
+"""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from tool_profiler import ToolProfiler, resource
+
+def test_disabled_returns_same_function(tmp_path):
+    """Disabled profiler must not wrap tools or create the output directory"""
+    profiler = ToolProfiler(enabled=False, output_dir=tmp_path / "profiles")
+
+    def tool():
+        return {"success": True}
+
+    assert profiler.profile(tool) is tool
+    assert not (tmp_path / "profiles").exists()
+
+def test_samples_every_n_calls(tmp_path):
+    """Only every Nth call runs under cProfile and writes a dump"""
+    profiler = ToolProfiler(enabled=True, output_dir=tmp_path, sample_every=3)
+    tool = profiler.profile(lambda: {"success": True})
+
+    for _ in range(6):
+        tool()
+
+    sampled = [c["call_number"] for c in profiler.calls if c["sampled"]]
+    assert sampled == [3, 6]
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+    assert all(c["profile_path"] is None for c in profiler.calls if not c["sampled"])
+
+def test_prunes_old_dumps(tmp_path):
+    """Dumps beyond max_files are deleted and dropped from the records"""
+    profiler = ToolProfiler(enabled=True, output_dir=tmp_path, max_files=2)
+    tool = profiler.profile(lambda: {"success": True})
+
+    for _ in range(5):
+        tool()
+
+    remaining = sorted(str(p) for p in tmp_path.glob("*.prof"))
+    assert len(remaining) == 2
+    assert sorted(c["profile_path"] for c in profiler.calls if c["profile_path"]) == remaining
+
+def test_unwritable_output_dir_keeps_timing(tmp_path):
+    """A bad profile directory disables dumps instead of raising"""
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    profiler = ToolProfiler(enabled=True, output_dir=blocker / "profiles")
+    tool = profiler.profile(lambda: {"success": True})
+
+    tool()
+
+    assert profiler.enabled and not profiler.dumps_enabled
+    assert profiler.calls[0]["sampled"] is False
+
+def test_records_failures(tmp_path):
+    """Both returned failures and raised exceptions are recorded as errors"""
+    profiler = ToolProfiler(enabled=True, output_dir=tmp_path)
+
+    @profiler.profile
+    def failing_tool():
+        return {"success": False, "message": "no client"}
+
+    @profiler.profile
+    def raising_tool():
+        raise ValueError("boom")
+
+    assert failing_tool() == {"success": False, "message": "no client"}
+    with pytest.raises(ValueError):
+        raising_tool()
+
+    failed, raised = profiler.calls
+    assert failed["success"] is False and failed["error"] == "no client"
+    assert raised["success"] is False and raised["error"] == "boom"
+
+@pytest.mark.skipif(resource is None, reason="resource module not available")
+def test_child_cpu_time_includes_subprocess(tmp_path):
+    """CPU time of waited-for subprocesses is attributed to the call"""
+    profiler = ToolProfiler(enabled=True, output_dir=tmp_path, sample_every=1000)
+
+    @profiler.profile
+    def spawning_tool():
+        subprocess.run([sys.executable, "-c", "sum(i * i for i in range(3_000_000))"], check=True)
+        return {"success": True}
+
+    spawning_tool()
+
+    assert profiler.calls[0]["child_cpu_time"] > 0
+
+def test_slowest_calls_filters_and_orders(tmp_path):
+    """Calls are sorted by wall time, filtered by tool and limit is clamped"""
+    profiler = ToolProfiler(enabled=True, output_dir=tmp_path, sample_every=1000)
+    for tool, wall_time in [("a", 0.1), ("b", 0.5), ("a", 0.3)]:
+        profiler.calls.append({"tool": tool, "wall_time": wall_time})
+
+    assert [c["wall_time"] for c in profiler.slowest_calls()] == [0.5, 0.3, 0.1]
+    assert [c["wall_time"] for c in profiler.slowest_calls(tool="a")] == [0.3, 0.1]
+    assert len(profiler.slowest_calls(limit=0)) == 1
+    assert len(profiler.slowest_calls(limit=-1)) == 1
+
+def test_nested_call_is_profiled_once(tmp_path):
+    """A tool calling itself produces one record and one dump for the outer call"""
+    profiler = ToolProfiler(enabled=True, output_dir=tmp_path)
+
+    @profiler.profile
+    def retrying_tool(attempt: int = 0):
+        if attempt == 0:
+            return retrying_tool(attempt=1)
+        return {"success": True, "attempt": attempt}
+
+    assert retrying_tool() == {"success": True, "attempt": 1}
+    assert len(profiler.calls) == 1
+    assert len(list(tmp_path.glob("*.prof"))) == 1
+
+    # The thread-local flag is cleared, so the next top-level call is recorded
+    retrying_tool()
+    assert len(profiler.calls) == 2
+
+def test_prunes_dumps_from_earlier_runs(tmp_path):
+    """Old dumps already in the directory count towards max_files"""
+    for i in range(4):
+        old = tmp_path / f"old_{i}.prof"
+        old.write_text("")
+        os.utime(old, (1000 + i, 1000 + i))
+
+    profiler = ToolProfiler(enabled=True, output_dir=tmp_path, max_files=2)
+    assert sorted(p.name for p in tmp_path.glob("*.prof")) == ["old_2.prof", "old_3.prof"]
+
+    profiler.profile(lambda: {"success": True})()
+    remaining = sorted(p.name for p in tmp_path.glob("*.prof"))
+    assert len(remaining) == 2 and "old_2.prof" not in remaining